@@ -6,140 +6,466 @@ Analyzes the original FAKK2 binaries (fakk2.exe, gamex86.dll, cgamex86.dll)
 and outputs detailed information about their structure, imports, exports,
 and other characteristics relevant to static recompilation.
 
+Headers, sections, imports and exports are decoded directly from a memory
+mapping of the file. pefile is only used as a fallback for images the direct
+reader rejects, and for the resource/version dump enabled by --full.
+
 Usage:
-    python3.13 pe_analyze.py <binary_path>
-    python3.13 pe_analyze.py --all <directory>
+    python3.13 pe_analyze.py [--full | --json] <binary_path>
+    python3.13 pe_analyze.py [--full | --json] --all <directory>
+
+--json prints the decoded fields as JSON (one object, or a list for --all)
+instead of the text report.
 
-Requires: pip install pefile
+Optional: pip install pefile (required for --full)
 """
 
 import sys
 import os
+import argparse
+import mmap
 import struct
-import datetime
+import time
+from operator import itemgetter
 
-try:
-    import pefile
-except ImportError:
-    print("Error: pefile module required. Install with: python3.13 -m pip install pefile")
-    sys.exit(1)
+# pefile, json, glob and concurrent.futures are imported where they are
+# used, so plain single-binary runs and pool workers skip loading them.
+
+
+# Fixed-layout PE records, compiled once at import time.
+_DOS = struct.Struct('<2s58xI')                     # e_magic ... e_lfanew
+_PE_SIG = struct.Struct('<4s')
+_FILE_HDR = struct.Struct('<2H3I2H')                # IMAGE_FILE_HEADER
+_OPT_MAGIC = struct.Struct('<H')
+_OPT32 = struct.Struct('<H2B12xI8xI28xI4x2H20xI')   # IMAGE_OPTIONAL_HEADER32
+_OPT64 = struct.Struct('<H2B12xI4xQ28xI4x2H36xI')   # IMAGE_OPTIONAL_HEADER64
+_DATA_DIR = struct.Struct('<2I')                    # IMAGE_DATA_DIRECTORY
+_SECTION = struct.Struct('<8s6I2HI')                # IMAGE_SECTION_HEADER
+_IMPDESC = struct.Struct('<5I')                     # IMAGE_IMPORT_DESCRIPTOR
+_EXPDIR = struct.Struct('<2I2H7I')                  # IMAGE_EXPORT_DIRECTORY
+_THUNK32 = struct.Struct('<I')
+_THUNK64 = struct.Struct('<Q')
+
+# (mask, name) tables for the characteristics bitfields
+_FILE_FLAGS = (
+    (0x0001, "RELOCS_STRIPPED"),
+    (0x0002, "EXECUTABLE_IMAGE"),
+    (0x0100, "32BIT_MACHINE"),
+    (0x2000, "DLL"),
+)
+_DLL_FLAGS = (
+    (0x0040, "DYNAMIC_BASE (ASLR)"),
+    (0x0100, "NX_COMPAT (DEP)"),
+    (0x4000, "GUARD_CF"),
+)
+_SECTION_FLAGS = (
+    (0x00000020, "CODE"),
+    (0x00000040, "INITIALIZED_DATA"),
+    (0x00000080, "UNINITIALIZED_DATA"),
+    (0x20000000, "EXECUTE"),
+    (0x40000000, "READ"),
+    (0x80000000, "WRITE"),
+)
+
+# Top-level resource directory IDs
+_RSRC_TYPES = {
+    1: "CURSOR", 2: "BITMAP", 3: "ICON", 4: "MENU", 5: "DIALOG",
+    6: "STRING", 9: "ACCELERATOR", 14: "GROUP_ICON", 16: "VERSION",
+}
+
+
+def _flag_decoder(table, sep):
+    """Build a memoized formatter for the bits of table set in a value.
+
+    Binaries in an --all sweep share a handful of distinct values, so each
+    one is only formatted once.
+    """
+    cache = {}
+
+    def decode(value):
+        text = cache.get(value)
+        if text is None:
+            text = cache[value] = sep.join([name for mask, name in table if value & mask])
+        return text
+    return decode
+
+
+_file_flags = _flag_decoder(_FILE_FLAGS, ' | ')
+_dll_flags = _flag_decoder(_DLL_FLAGS, ' | ')
+_section_flags = _flag_decoder(_SECTION_FLAGS, ', ')
+
+
+def _cstring(mm, offset):
+    """Read a NUL-terminated byte string starting at offset."""
+    end = mm.find(b'\x00', offset)
+    if end < 0:
+        end = len(mm)
+    return mm[offset:end]
+
+
+def _parse_pe(mm):
+    """Decode the summary fields of a PE image from a read-only mapping.
+
+    Raises ValueError or struct.error if the image is malformed.
+    """
+    mz, e_lfanew = _DOS.unpack_from(mm, 0)
+    if mz != b'MZ':
+        raise ValueError("missing MZ signature")
+    if _PE_SIG.unpack_from(mm, e_lfanew)[0] != b'PE\x00\x00':
+        raise ValueError("missing PE signature")
+
+    file_hdr = e_lfanew + _PE_SIG.size
+    machine, nsect, timestamp, _, _, opt_size, characteristics = \
+        _FILE_HDR.unpack_from(mm, file_hdr)
+
+    opt = file_hdr + _FILE_HDR.size
+    (magic,) = _OPT_MAGIC.unpack_from(mm, opt)
+    if magic == 0x10b:
+        opt_hdr, pe32plus = _OPT32, False
+    elif magic == 0x20b:
+        opt_hdr, pe32plus = _OPT64, True
+    else:
+        raise ValueError(f"unknown optional header magic 0x{magic:x}")
+    (_, linker_major, linker_minor, entry_point, image_base, size_of_headers,
+     subsystem, dll_characteristics, n_rva) = opt_hdr.unpack_from(mm, opt)
+    data_dirs = opt + opt_hdr.size
+
+    # Copy the section table out in one slice and let iter_unpack walk the
+    # 40-byte records in C
+    table = opt + opt_size
+    region = mm[table:table + nsect * _SECTION.size]
+    if len(region) != nsect * _SECTION.size:
+        raise ValueError("truncated section table")
+    sections = [(name, vsize, vaddr, rsize, raddr, sc)
+                for name, vsize, vaddr, rsize, raddr, _, _, _, _, sc in _SECTION.iter_unpack(region)]
+
+    def to_offset(rva):
+        if rva < size_of_headers:
+            return rva
+        for _, vsize, vaddr, rsize, raddr, _ in sections:
+            if vaddr <= rva < vaddr + max(vsize, rsize):
+                return rva - vaddr + raddr
+        raise ValueError(f"RVA 0x{rva:08x} is not mapped by any section")
+
+    def directory(index):
+        if index >= n_rva:
+            return 0
+        return _DATA_DIR.unpack_from(mm, data_dirs + index * _DATA_DIR.size)[0]
+
+    import_rva = directory(1)
+    export_rva = directory(0)
+
+    return {
+        'machine': machine,
+        'timestamp': timestamp,
+        'characteristics': characteristics,
+        'linker_version': (linker_major, linker_minor),
+        'subsystem': subsystem,
+        'image_base': image_base,
+        'entry_point': entry_point,
+        'dll_characteristics': dll_characteristics,
+        'sections': sections,
+        'imports': _parse_imports(mm, to_offset, import_rva, pe32plus) if import_rva else None,
+        'exports': _parse_exports(mm, to_offset, export_rva) if export_rva else None,
+    }
+
+
+def _parse_imports(mm, to_offset, rva, pe32plus):
+    """Walk the IMAGE_IMPORT_DESCRIPTOR array and its thunk tables.
+
+    Returns [(dll, [(name, ordinal), ...]), ...]. name is b'' for imports
+    by ordinal and ordinal is None for imports by name.
+    """
+    thunk_struct = _THUNK64 if pe32plus else _THUNK32
+    thunk_size = thunk_struct.size
+    ordinal_flag = 1 << (thunk_size * 8 - 1)
+    unpack_desc = _IMPDESC.unpack_from
+    unpack_thunk = thunk_struct.unpack_from
+
+    imports = []
+    desc = to_offset(rva)
+    while True:
+        original_first_thunk, _, _, name_rva, first_thunk = unpack_desc(mm, desc)
+        if not (original_first_thunk or name_rva or first_thunk):
+            break
+        dll = _cstring(mm, to_offset(name_rva))
+
+        funcs = []
+        thunk = to_offset(original_first_thunk or first_thunk)
+        while True:
+            (value,) = unpack_thunk(mm, thunk)
+            if not value:
+                break
+            if value & ordinal_flag:
+                funcs.append((b'', value & 0xffff))
+            else:
+                # IMAGE_IMPORT_BY_NAME: 2-byte hint followed by the name
+                funcs.append((_cstring(mm, to_offset(value & 0x7fffffff) + 2), None))
+            thunk += thunk_size
+
+        imports.append((dll, funcs))
+        desc += _IMPDESC.size
+    return imports
 
 
-def analyze_pe(filepath):
-    """Comprehensive PE analysis of a single binary."""
+def _parse_exports(mm, to_offset, rva):
+    """Decode IMAGE_EXPORT_DIRECTORY into (ordinal, address, name) tuples.
+
+    Returns None if the ordinal table is corrupt.
+    """
+    (_, _, _, _, _, base, nfuncs, nnames,
+     funcs_rva, names_rva, ordinals_rva) = _EXPDIR.unpack_from(mm, to_offset(rva))
+
+    # The three export arrays are variable-length, so they are decoded in
+    # one call each rather than through a cached Struct.
+    addresses = struct.unpack_from(f'<{nfuncs}I', mm, to_offset(funcs_rva)) if nfuncs else ()
+    if nnames:
+        name_rvas = struct.unpack_from(f'<{nnames}I', mm, to_offset(names_rva))
+        indices = struct.unpack_from(f'<{nnames}H', mm, to_offset(ordinals_rva))
+    else:
+        name_rvas = indices = ()
+
+    # Like pefile, treat an ordinal past AddressOfFunctions as a corrupt
+    # table with no usable exports, and skip names bound to a null address
+    if any(index >= nfuncs for index in indices):
+        return None
+    exports = []
+    for name_rva, index in zip(name_rvas, indices):
+        address = addresses[index]
+        if address:
+            exports.append((base + index, address, _cstring(mm, to_offset(name_rva))))
+    named = set(indices)
+    for index, address in enumerate(addresses):
+        if address and index not in named:
+            exports.append((base + index, address, None))
+    return exports
+
+
+def _have_pefile():
+    """Import pefile on first use; False if it is not installed."""
+    try:
+        import pefile
+    except ImportError:
+        return False
+    return True
+
+
+def _parse_pe_pefile(filepath):
+    """Fallback for images the direct reader cannot decode."""
+    import pefile
     pe = pefile.PE(filepath)
+    fh = pe.FILE_HEADER
+    oh = pe.OPTIONAL_HEADER
+    info = {
+        'machine': fh.Machine,
+        'timestamp': fh.TimeDateStamp,
+        'characteristics': fh.Characteristics,
+        'linker_version': (oh.MajorLinkerVersion, oh.MinorLinkerVersion),
+        'subsystem': oh.Subsystem,
+        'image_base': oh.ImageBase,
+        'entry_point': oh.AddressOfEntryPoint,
+        'dll_characteristics': oh.DllCharacteristics,
+        'sections': [(s.Name, s.Misc_VirtualSize, s.VirtualAddress, s.SizeOfRawData,
+                      s.PointerToRawData, s.Characteristics) for s in pe.sections],
+        'imports': None,
+        'exports': None,
+    }
+    if hasattr(pe, 'DIRECTORY_ENTRY_IMPORT'):
+        info['imports'] = [(entry.dll, [(imp.name or b'', imp.ordinal) for imp in entry.imports])
+                           for entry in pe.DIRECTORY_ENTRY_IMPORT]
+    if hasattr(pe, 'DIRECTORY_ENTRY_EXPORT'):
+        info['exports'] = [(exp.ordinal, exp.address, exp.name)
+                           for exp in pe.DIRECTORY_ENTRY_EXPORT.symbols]
+    pe.close()
+    return info
+
+
+def _read_pe(filepath):
+    """Parse a binary with the direct reader, falling back to pefile."""
+    with open(filepath, 'rb') as f:
+        if hasattr(os, 'posix_fadvise'):
+            # Start readahead now so the kernel fetches the file while other
+            # binaries in an --all sweep are being parsed
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _parse_pe(mm)
+        except (ValueError, struct.error):
+            if not _have_pefile():
+                raise
+    return _parse_pe_pefile(filepath)
+
+
+def _pe_json(filename, filesize, info):
+    """Shape the parsed fields for json.dump, decoding names.
+
+    imports and exports are null when the image has no such directory and
+    an empty list when the directory is present but empty.
+    """
+    image_base = info['image_base']
+    imports = info['imports']
+    exports = info['exports']
+    return {
+        'file': filename,
+        'size': filesize,
+        'machine': info['machine'],
+        'timestamp': info['timestamp'],
+        'linker_version': "%d.%d" % info['linker_version'],
+        'subsystem': info['subsystem'],
+        'image_base': image_base,
+        'entry_point': image_base + info['entry_point'],
+        'characteristics': info['characteristics'],
+        'dll_characteristics': info['dll_characteristics'],
+        'sections': [
+            {'name': name.decode('ascii', errors='replace').rstrip('\x00'),
+             'virtual_size': vsize, 'virtual_address': vaddr,
+             'raw_size': rsize, 'characteristics': sc}
+            for name, vsize, vaddr, rsize, _, sc in info['sections']
+        ],
+        'imports': [
+            {'dll': dll.decode('ascii', errors='replace'),
+             'functions': [{'name': name.decode('ascii', errors='replace') if name else None,
+                            'ordinal': ordinal} for name, ordinal in funcs]}
+            for dll, funcs in imports
+        ] if imports is not None else None,
+        'exports': [
+            {'ordinal': ordinal, 'address': address,
+             'name': name.decode('ascii', errors='replace') if name else None}
+            for ordinal, address, name in exports
+        ] if exports is not None else None,
+    }
+
+
+def _write_json(obj):
+    """Dump obj to stdout as compact JSON in a single call."""
+    import json
+    json.dump(obj, sys.stdout, separators=(',', ':'))
+    sys.stdout.write('\n')
+
+
+def analyze_pe(filepath, full=False, as_json=False):
+    """Comprehensive PE analysis of a single binary.
+
+    Returns the text report, or a dict ready for json.dump if as_json is set.
+    """
+    info = _read_pe(filepath)
     filename = os.path.basename(filepath)
     filesize = os.path.getsize(filepath)
+    if as_json:
+        return _pe_json(filename, filesize, info)
 
-    print(f"\n{'='*72}")
-    print(f"  PE Analysis: {filename}")
-    print(f"  Size: {filesize:,} bytes")
-    print(f"{'='*72}\n")
+    # Output is collected here and written in one go at the end
+    out = []
+    out.append(f"\n{'='*72}\n")
+    out.append(f"  PE Analysis: {filename}\n")
+    out.append(f"  Size: {filesize:,} bytes\n")
+    out.append(f"{'='*72}\n\n")
 
     # --- Basic Headers ---
-    print("--- PE Header ---")
-    machine = pe.FILE_HEADER.Machine
+    out.append("--- PE Header ---\n")
+    machine = info['machine']
     machine_str = {0x14c: "Intel 386 (32-bit)", 0x8664: "AMD64 (64-bit)"}.get(machine, f"Unknown (0x{machine:x})")
-    print(f"  Machine:       {machine_str}")
+    out.append(f"  Machine:       {machine_str}\n")
 
-    timestamp = pe.FILE_HEADER.TimeDateStamp
-    dt = datetime.datetime.utcfromtimestamp(timestamp)
-    print(f"  Compile time:  {dt.strftime('%Y-%m-%d %H:%M:%S UTC')} (0x{timestamp:08x})")
+    timestamp = info['timestamp']
+    t = time.gmtime(timestamp)
+    out.append(f"  Compile time:  {t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d} "
+               f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d} UTC (0x{timestamp:08x})\n")
 
-    linker = f"{pe.OPTIONAL_HEADER.MajorLinkerVersion}.{pe.OPTIONAL_HEADER.MinorLinkerVersion}"
-    print(f"  Linker:        {linker}")
+    linker = "%d.%d" % info['linker_version']
+    out.append(f"  Linker:        {linker}\n")
 
-    subsys = pe.OPTIONAL_HEADER.Subsystem
+    subsys = info['subsystem']
     subsys_str = {2: "Windows GUI", 3: "Windows Console"}.get(subsys, f"Unknown ({subsys})")
-    print(f"  Subsystem:     {subsys_str}")
+    out.append(f"  Subsystem:     {subsys_str}\n")
 
-    print(f"  Image base:    0x{pe.OPTIONAL_HEADER.ImageBase:08x}")
-    print(f"  Entry point:   0x{pe.OPTIONAL_HEADER.ImageBase + pe.OPTIONAL_HEADER.AddressOfEntryPoint:08x}")
+    image_base = info['image_base']
+    out.append(f"  Image base:    0x{image_base:08x}\n")
+    out.append(f"  Entry point:   0x{image_base + info['entry_point']:08x}\n")
 
-    chars = pe.FILE_HEADER.Characteristics
-    char_flags = []
-    if chars & 0x0001: char_flags.append("RELOCS_STRIPPED")
-    if chars & 0x0002: char_flags.append("EXECUTABLE_IMAGE")
-    if chars & 0x0100: char_flags.append("32BIT_MACHINE")
-    if chars & 0x2000: char_flags.append("DLL")
-    print(f"  Characteristics: {' | '.join(char_flags)}")
+    char_flags = _file_flags(info['characteristics'])
+    out.append(f"  Characteristics: {char_flags}\n")
 
-    dll_chars = pe.OPTIONAL_HEADER.DllCharacteristics
+    dll_chars = info['dll_characteristics']
     if dll_chars == 0:
-        print(f"  DLL Chars:     0x0000 (NONE - no ASLR, no DEP, no CFG)")
+        out.append(f"  DLL Chars:     0x0000 (NONE - no ASLR, no DEP, no CFG)\n")
     else:
-        dc_flags = []
-        if dll_chars & 0x0040: dc_flags.append("DYNAMIC_BASE (ASLR)")
-        if dll_chars & 0x0100: dc_flags.append("NX_COMPAT (DEP)")
-        if dll_chars & 0x4000: dc_flags.append("GUARD_CF")
-        print(f"  DLL Chars:     {' | '.join(dc_flags)}")
+        dc_flags = _dll_flags(dll_chars)
+        out.append(f"  DLL Chars:     {dc_flags}\n")
 
     # --- Sections ---
-    print("\n--- Sections ---")
-    print(f"  {'Name':<10} {'VirtSize':>12} {'RawSize':>12} {'VirtAddr':>12} {'Characteristics'}")
-    for section in pe.sections:
-        name = section.Name.decode('ascii', errors='replace').rstrip('\x00')
-        chars_str = []
-        sc = section.Characteristics
-        if sc & 0x20: chars_str.append("CODE")
-        if sc & 0x40: chars_str.append("INITIALIZED_DATA")
-        if sc & 0x80: chars_str.append("UNINITIALIZED_DATA")
-        if sc & 0x20000000: chars_str.append("EXECUTE")
-        if sc & 0x40000000: chars_str.append("READ")
-        if sc & 0x80000000: chars_str.append("WRITE")
-        print(f"  {name:<10} {section.Misc_VirtualSize:>12,} {section.SizeOfRawData:>12,} 0x{section.VirtualAddress:08x} {', '.join(chars_str)}")
+    out.append("\n--- Sections ---\n")
+    out.append(f"  {'Name':<10} {'VirtSize':>12} {'RawSize':>12} {'VirtAddr':>12} {'Characteristics'}\n")
+    for name, vsize, vaddr, rsize, _, sc in info['sections']:
+        name = name.decode('ascii', errors='replace').rstrip('\x00')
+        chars_str = _section_flags(sc)
+        out.append(f"  {name:<10} {vsize:>12,} {rsize:>12,} 0x{vaddr:08x} {chars_str}\n")
 
     # --- Imports ---
-    print("\n--- Imports ---")
-    if hasattr(pe, 'DIRECTORY_ENTRY_IMPORT'):
+    out.append("\n--- Imports ---\n")
+    if info['imports']:
         total_imports = 0
-        for entry in pe.DIRECTORY_ENTRY_IMPORT:
-            dll_name = entry.dll.decode('ascii', errors='replace')
-            funcs = [imp for imp in entry.imports]
+        for dll, funcs in info['imports']:
+            dll_name = dll.decode('ascii', errors='replace')
             total_imports += len(funcs)
-            print(f"\n  {dll_name} ({len(funcs)} functions):")
-            for imp in sorted(funcs, key=lambda x: (x.name or b'').decode('ascii', errors='replace')):
-                if imp.name:
-                    name = imp.name.decode('ascii', errors='replace')
-                    print(f"    {name}")
+            out.append(f"\n  {dll_name} ({len(funcs)} functions):\n")
+            # Sort on the raw name bytes; ordinal-only imports (b'') come first
+            for name, ordinal in sorted(funcs, key=itemgetter(0)):
+                if name:
+                    name = name.decode('ascii', errors='replace')
+                    out.append(f"    {name}\n")
                 else:
-                    print(f"    Ordinal {imp.ordinal}")
-        print(f"\n  Total imports: {total_imports}")
+                    out.append(f"    Ordinal {ordinal}\n")
+        out.append(f"\n  Total imports: {total_imports}\n")
     else:
-        print("  No imports found")
+        out.append("  No imports found\n")
 
     # --- Exports ---
-    print("\n--- Exports ---")
-    if hasattr(pe, 'DIRECTORY_ENTRY_EXPORT'):
-        exports = pe.DIRECTORY_ENTRY_EXPORT.symbols
-        print(f"  {len(exports)} exported symbols:")
-        for exp in exports:
-            name = exp.name.decode('ascii', errors='replace') if exp.name else f"Ordinal_{exp.ordinal}"
-            print(f"    [{exp.ordinal:>3}] 0x{exp.address:08x}  {name}")
+    out.append("\n--- Exports ---\n")
+    if info['exports'] is not None:
+        exports = info['exports']
+        out.append(f"  {len(exports)} exported symbols:\n")
+        for ordinal, address, name in exports:
+            name = name.decode('ascii', errors='replace') if name else f"Ordinal_{ordinal}"
+            out.append(f"    [{ordinal:>3}] 0x{address:08x}  {name}\n")
     else:
-        print("  No exports found")
+        out.append("  No exports found\n")
+
+    if full:
+        if not _have_pefile():
+            out.append("\n  --full requires pefile. Install with: python3.13 -m pip install pefile\n")
+        else:
+            full_details(filepath, out)
+
+    return ''.join(out)
+
+
+def full_details(filepath, out):
+    """Append resources and version info, decoded via pefile, to out."""
+    import pefile
+    pe = pefile.PE(filepath)
 
     # --- Resources ---
     if hasattr(pe, 'DIRECTORY_ENTRY_RESOURCE'):
-        print("\n--- Resources ---")
-        def print_resources(entries, indent=0):
-            for entry in entries:
-                name = entry.name.string.decode('utf-8') if entry.name else f"ID={entry.id}"
-                prefix = "  " * (indent + 1)
-                if entry.struct.DataIsDirectory:
-                    rtype = {1: "CURSOR", 2: "BITMAP", 3: "ICON", 4: "MENU", 5: "DIALOG",
-                             6: "STRING", 9: "ACCELERATOR", 14: "GROUP_ICON",
-                             16: "VERSION"}.get(entry.id, name) if indent == 0 else name
-                    print(f"{prefix}[{rtype}]")
-                    print_resources(entry.directory.entries, indent + 1)
-                else:
-                    size = entry.data.struct.Size
-                    print(f"{prefix}{name}: {size:,} bytes")
-        print_resources(pe.DIRECTORY_ENTRY_RESOURCE.entries)
+        out.append("\n--- Resources ---\n")
+        # Depth-first walk with an explicit stack; children are pushed in
+        # reverse so they pop in directory order
+        stack = [(entry, 0) for entry in reversed(pe.DIRECTORY_ENTRY_RESOURCE.entries)]
+        while stack:
+            entry, indent = stack.pop()
+            name = entry.name.string.decode('utf-8') if entry.name else f"ID={entry.id}"
+            prefix = "  " * (indent + 1)
+            if entry.struct.DataIsDirectory:
+                rtype = _RSRC_TYPES.get(entry.id, name) if indent == 0 else name
+                out.append(f"{prefix}[{rtype}]\n")
+                stack.extend((child, indent + 1) for child in reversed(entry.directory.entries))
+            else:
+                size = entry.data.struct.Size
+                out.append(f"{prefix}{name}: {size:,} bytes\n")
 
     # --- Version Info ---
     if hasattr(pe, 'FileInfo'):
-        print("\n--- Version Info ---")
+        out.append("\n--- Version Info ---\n")
         for fileinfo in pe.FileInfo:
             for entry in fileinfo:
                 if hasattr(entry, 'StringTable'):
@@ -147,25 +473,52 @@ def analyze_pe(filepath):
                         for key, value in st.entries.items():
                             k = key.decode('utf-8', errors='replace')
                             v = value.decode('utf-8', errors='replace')
-                            print(f"  {k}: {v}")
+                            out.append(f"  {k}: {v}\n")
 
     pe.close()
 
 
 def main():
-    if len(sys.argv) < 2:
-        print(f"Usage: {sys.argv[0]} <binary_path>")
-        print(f"       {sys.argv[0]} --all <directory>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="PE binary analysis tool for FAKK2 recomp.")
+    parser.add_argument('binary_path', nargs='?', help="binary to analyze")
+    parser.add_argument('--all', metavar='DIRECTORY', nargs='?', const='.',
+                        help="analyze every .exe and .dll in DIRECTORY (default: .)")
+    parser.add_argument('--full', action='store_true',
+                        help="also dump resources and version info (requires pefile)")
+    parser.add_argument('--json', action='store_true',
+                        help="print the decoded fields as JSON instead of the text report")
+    args = parser.parse_args()
+
+    if args.all is None and args.binary_path is None:
+        parser.error("a binary path or --all is required")
+    if args.all is not None and args.binary_path is not None:
+        parser.error("a binary path cannot be combined with --all")
+    if args.full and args.json:
+        parser.error("--full is not available with --json")
 
-    if sys.argv[1] == '--all':
-        directory = sys.argv[2] if len(sys.argv) > 2 else '.'
+    if args.all is not None:
+        import glob
+        paths = []
         for ext in ('*.exe', '*.dll'):
-            import glob
-            for filepath in sorted(glob.glob(os.path.join(directory, ext))):
-                analyze_pe(filepath)
+            paths.extend(sorted(glob.glob(os.path.join(args.all, ext))))
+        # Binaries are analyzed in parallel; map() yields reports in order.
+        # The direct reader is light enough that threads, which share the
+        # compiled Structs and skip per-worker imports, mostly overlap file
+        # I/O. pefile's --full dump is CPU-bound Python, so it gets processes.
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        from itertools import repeat
+        executor = ProcessPoolExecutor() if args.full else ThreadPoolExecutor(max_workers=4)
+        with executor:
+            reports = executor.map(analyze_pe, paths, repeat(args.full), repeat(args.json))
+            if args.json:
+                _write_json(list(reports))
+            else:
+                for report in reports:
+                    sys.stdout.write(report)
+    elif args.json:
+        _write_json(analyze_pe(args.binary_path, as_json=True))
     else:
-        analyze_pe(sys.argv[1])
+        sys.stdout.write(analyze_pe(args.binary_path, args.full))
 
 
 if __name__ == '__main__':
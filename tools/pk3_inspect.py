@@ -6,134 +6,395 @@ Lists and categorizes the contents of FAKK2's PK3 archives.
 Useful for understanding the game's asset structure.
 
 Usage:
-    python3.13 pk3_inspect.py <pk3_path>
-    python3.13 pk3_inspect.py --summary <pk3_directory>
+    python3.13 pk3_inspect.py [--json] <pk3_path>
+    python3.13 pk3_inspect.py [--json] --summary <pk3_directory>
+
+--json prints the collected stats as JSON (one object, or a list for
+--summary) instead of the text report.
 """
 
 import sys
 import os
-import zipfile
+import argparse
+import mmap
+import struct
 from collections import defaultdict
+from operator import itemgetter, le
 
 
-def inspect_pk3(filepath):
-    """Inspect a single PK3 archive."""
-    filename = os.path.basename(filepath)
-    filesize = os.path.getsize(filepath)
+# ZIP records, compiled once at import time. Only the central directory is
+# read; member data is never touched, so nothing is decompressed.
+_EOCD = struct.Struct('<4s4H2LH')               # end of central directory
+_EOCD64_LOCATOR = struct.Struct('<4sLQL')       # zip64 end of central dir locator
+_EOCD64 = struct.Struct('<4sQ2H2L4Q')           # zip64 end of central directory
+_CDIR = struct.Struct('<4s4B4HL2L5H2L')         # central directory file header
+_EXTRA = struct.Struct('<2H')                   # extra field id + length
+_U64 = struct.Struct('<Q')
+
+_EOCD_SIG = b'PK\x05\x06'
+_EOCD64_LOCATOR_SIG = b'PK\x06\x07'
+_EOCD64_SIG = b'PK\x06\x06'
+_CDIR_SIG = b'PK\x01\x02'
+
+# ASCII-only lowercase for extension bytes; names are never decoded on the
+# hot path.
+_LOWER = bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ', b'abcdefghijklmnopqrstuvwxyz')
+_DOT = ord('.')
+
+# Extensions common in FAKK2 PK3s get a fixed slot in flat count/size lists;
+# anything else falls through to a dict.
+_KNOWN_EXTS = (
+    b'(none)', b'.tga', b'.jpg', b'.wav', b'.mp3', b'.tik', b'.tan', b'.skb',
+    b'.ska', b'.md3', b'.shader', b'.bsp', b'.cfg', b'.scr', b'.txt',
+)
+_EXT_INDEX = {ext: i for i, ext in enumerate(_KNOWN_EXTS)}
+
+
+def _find_central_directory(mm):
+    """Locate the central directory via the EOCD record.
+
+    Returns (start, stop) offsets of the central directory. Raises ValueError if the file is not a
+    ZIP archive.
+    """
+    size = len(mm)
+    floor = max(0, size - _EOCD.size - 0xffff)
+    pos = mm.rfind(_EOCD_SIG, floor)
+    while pos >= 0:
+        if pos + _EOCD.size <= size:
+            _, _, _, _, _, cd_size, cd_offset, comment_len = _EOCD.unpack_from(mm, pos)
+            if pos + _EOCD.size + comment_len <= size:
+                break
+        pos = mm.rfind(_EOCD_SIG, floor, pos)
+    else:
+        raise ValueError("end of central directory not found")
+
+    # Some writers (Info-ZIP, streaming packers) always emit the zip64
+    # records, even when the classic fields fit. They sit between the
+    # central directory and the classic EOCD, so look for the locator first.
+    end = pos
+    locator = pos - _EOCD64_LOCATOR.size
+    if locator >= 0 and _EOCD64_LOCATOR.unpack_from(mm, locator)[0] == _EOCD64_LOCATOR_SIG:
+        end = locator - _EOCD64.size
+        if end < 0:
+            raise ValueError("corrupt zip64 end of central directory")
+        sig, _, _, _, _, _, _, _, cd_size, cd_offset = _EOCD64.unpack_from(mm, end)
+        if sig != _EOCD64_SIG:
+            raise ValueError("corrupt zip64 end of central directory")
+    elif cd_size == 0xffffffff:
+        raise ValueError("zip64 end of central directory locator missing")
+
+    # Measure back from the EOCD rather than trusting cd_offset, so archives
+    # with data prepended (self-extractors) still resolve correctly.
+    start = end - cd_size
+    if start < 0:
+        raise ValueError("central directory offset out of range")
+    return start, end
+
+
+def _zip64_sizes(mm, offset, extra_len, compress_size, file_size):
+    """Pull 64-bit sizes out of a zip64 extended information extra field."""
+    end = offset + extra_len
+    while offset + _EXTRA.size <= end:
+        tag, length = _EXTRA.unpack_from(mm, offset)
+        offset += _EXTRA.size
+        if tag == 0x0001:
+            if file_size == 0xffffffff:
+                (file_size,) = _U64.unpack_from(mm, offset)
+                offset += 8
+            if compress_size == 0xffffffff:
+                (compress_size,) = _U64.unpack_from(mm, offset)
+            break
+        offset += length
+    return compress_size, file_size
+
+
+def _iter_central_directory(mm):
+    """Yield (filename, compress_size, file_size) for every archive member.
+
+    Filenames are returned as UTF-8 encoded bytes.
+    """
+    # Walk the central directory by extent rather than by the EOCD entry
+    # count: that field is 16 bits and wraps on writers that skip zip64.
+    offset, stop = _find_central_directory(mm)
+    unpack = _CDIR.unpack_from
+    while offset < stop:
+        (sig, _, _, _, _, flags, _, _, _, _, compress_size, file_size,
+         name_len, extra_len, comment_len, _, _, _, _) = unpack(mm, offset)
+        if sig != _CDIR_SIG:
+            raise ValueError("bad central directory entry signature")
+        offset += _CDIR.size
+        name = mm[offset:offset + name_len]
+        if compress_size == 0xffffffff or file_size == 0xffffffff:
+            compress_size, file_size = _zip64_sizes(
+                mm, offset + name_len, extra_len, compress_size, file_size)
+        offset += name_len + extra_len + comment_len
+        # Bit 11 marks a UTF-8 name; anything else is CP437, as in zipfile.
+        # Re-encode the rare non-ASCII CP437 name so every name is UTF-8.
+        if not flags & 0x800 and not name.isascii():
+            name = name.decode('cp437').encode('utf-8')
+        yield name, compress_size, file_size
+
+
+def _by_name(files):
+    """Return (name, size) pairs ordered by name.
+
+    Q3-family packers write the central directory already sorted, so the
+    usual case is a single linear check and no sort.
+    """
+    names = [name for name, _ in files]
+    if all(map(le, names, names[1:])):
+        return files
+    return sorted(files, key=itemgetter(0))
+
+
+def _scan_pk3(mm):
+    """Aggregate the central directory of a mapped PK3.
+
+    Names stay as bytes. Extension and directory rows are (name, count,
+    size) tuples sorted by size; the TIKI/shader/BSP listings are
+    (name, size) pairs in name order.
+    """
+    # Totals, extension and top-level directory stats, and the
+    # TIKI/shader/BSP listings are all gathered in one pass over the
+    # central directory; no per-entry records are kept
+    nfiles = total_compressed = total_uncompressed = 0
+    ext_index = _EXT_INDEX
+    ext_counts = [0] * len(_KNOWN_EXTS)
+    ext_sizes = [0] * len(_KNOWN_EXTS)
+    other_counts = defaultdict(int)
+    other_sizes = defaultdict(int)
+    dir_stats = defaultdict(lambda: {'count': 0, 'size': 0})
+    tiki_files, shader_files, bsp_files = [], [], []
+    listed = {b'.tik': tiki_files, b'.shader': shader_files, b'.bsp': bsp_files}
+
+    for name, compress_size, file_size in _iter_central_directory(mm):
+        nfiles += 1
+        total_compressed += compress_size
+        total_uncompressed += file_size
+        if name.endswith(b'/'):
+            continue
+        dot = name.rfind(b'.')
+        slash = name.rfind(b'/')
+        suffix = name[dot:].translate(_LOWER)
+
+        files = listed.get(suffix)
+        if files is not None:
+            files.append((name, file_size))
+
+        # Same rule as os.path.splitext: leading dots of the basename
+        # do not start an extension
+        if dot > slash + 1 and (name[slash + 1] != _DOT or name[slash + 1:dot].strip(b'.')):
+            ext = suffix
+        else:
+            ext = b'(none)'
+        index = ext_index.get(ext)
+        if index is None:
+            other_counts[ext] += 1
+            other_sizes[ext] += file_size
+        else:
+            ext_counts[index] += 1
+            ext_sizes[index] += file_size
 
-    print(f"\n{'='*60}")
-    print(f"  PK3: {filename}")
-    print(f"  Size: {filesize:,} bytes ({filesize / 1024 / 1024:.1f} MB)")
-    print(f"{'='*60}")
+        # Top-level directory
+        slash = name.find(b'/')
+        topdir = name[:slash] if slash >= 0 else b'(root)'
+        dir_stats[topdir]['count'] += 1
+        dir_stats[topdir]['size'] += file_size
 
+    ext_stats = [(ext, count, size)
+                 for ext, count, size in zip(_KNOWN_EXTS, ext_counts, ext_sizes)
+                 if count]
+    ext_stats.extend((ext, other_counts[ext], size) for ext, size in other_sizes.items())
+    ext_stats.sort(key=lambda x: (-x[2], x[0]))
+    dir_rows = sorted(((dirname, stats['count'], stats['size'])
+                       for dirname, stats in dir_stats.items()),
+                      key=lambda x: -x[2])
+
+    return {
+        'files': nfiles,
+        'compressed': total_compressed,
+        'uncompressed': total_uncompressed,
+        'extensions': ext_stats,
+        'directories': dir_rows,
+        'tiki': _by_name(tiki_files),
+        'shaders': _by_name(shader_files),
+        'bsp': _by_name(bsp_files),
+    }
+
+
+def _pk3_json(filename, filesize, stats, error):
+    """Shape inspect_pk3 results for json.dump, decoding names."""
+    result = {'file': filename, 'size': filesize}
+    if error is not None:
+        result['error'] = error
+        return result
+
+    def rows(items):
+        return [{'name': name.decode('utf-8', errors='replace'), 'count': count, 'size': size}
+                for name, count, size in items]
+
+    def files(items):
+        return [{'name': name.decode('utf-8', errors='replace'), 'size': size}
+                for name, size in items]
+
+    result.update(
+        files=stats['files'],
+        compressed=stats['compressed'],
+        uncompressed=stats['uncompressed'],
+        extensions=rows(stats['extensions']),
+        directories=rows(stats['directories']),
+        tiki=files(stats['tiki']),
+        shaders=files(stats['shaders']),
+        bsp=files(stats['bsp']),
+    )
+    return result
+
+
+def _write_json(obj):
+    """Dump obj to stdout as compact JSON in a single call."""
+    import json
+    json.dump(obj, sys.stdout, separators=(',', ':'))
+    sys.stdout.write('\n')
+
+
+def inspect_pk3(filepath, filesize=None, as_json=False):
+    """Inspect a single PK3 archive.
+
+    Returns the text report, or a dict ready for json.dump if as_json is
+    set. filesize may be passed in when the caller already has it from a
+    directory scan.
+    """
+    filename = os.path.basename(filepath)
+    if filesize is None:
+        filesize = os.path.getsize(filepath)
+
+    stats = error = None
     try:
-        with zipfile.ZipFile(filepath, 'r') as zf:
-            infos = zf.infolist()
-            total_compressed = sum(i.compress_size for i in infos)
-            total_uncompressed = sum(i.file_size for i in infos)
-
-            print(f"\n  Files: {len(infos)}")
-            print(f"  Compressed:   {total_compressed:>12,} bytes")
-            print(f"  Uncompressed: {total_uncompressed:>12,} bytes")
-
-            if total_compressed > 0:
-                ratio = (1 - total_compressed / max(total_uncompressed, 1)) * 100
-                print(f"  Compression:  {ratio:.1f}%")
-
-            # Categorize by extension
-            ext_stats = defaultdict(lambda: {'count': 0, 'size': 0})
-            dir_stats = defaultdict(lambda: {'count': 0, 'size': 0})
-
-            for info in infos:
-                if info.is_dir():
-                    continue
-                name = info.filename
-                ext = os.path.splitext(name)[1].lower()
-                if not ext:
-                    ext = '(none)'
-
-                ext_stats[ext]['count'] += 1
-                ext_stats[ext]['size'] += info.file_size
-
-                # Top-level directory
-                parts = name.split('/')
-                if len(parts) > 1:
-                    topdir = parts[0]
-                else:
-                    topdir = '(root)'
-                dir_stats[topdir]['count'] += 1
-                dir_stats[topdir]['size'] += info.file_size
-
-            # Print by extension
-            print(f"\n  --- By Extension ---")
-            print(f"  {'Extension':<12} {'Count':>8} {'Size':>14}")
-            for ext, stats in sorted(ext_stats.items(), key=lambda x: -x[1]['size']):
-                size_str = f"{stats['size']:,}"
-                print(f"  {ext:<12} {stats['count']:>8} {size_str:>14}")
-
-            # Print by directory
-            print(f"\n  --- By Directory ---")
-            print(f"  {'Directory':<24} {'Count':>8} {'Size':>14}")
-            for dirname, stats in sorted(dir_stats.items(), key=lambda x: -x[1]['size']):
-                size_str = f"{stats['size']:,}"
-                print(f"  {dirname:<24} {stats['count']:>8} {size_str:>14}")
-
-            # List TIKI files specifically (key for understanding models)
-            tiki_files = [i for i in infos if i.filename.lower().endswith('.tik')]
-            if tiki_files:
-                print(f"\n  --- TIKI Models ({len(tiki_files)}) ---")
-                for info in sorted(tiki_files, key=lambda x: x.filename):
-                    print(f"  {info.filename} ({info.file_size:,} bytes)")
-
-            # List shader files
-            shader_files = [i for i in infos if i.filename.lower().endswith('.shader')]
-            if shader_files:
-                print(f"\n  --- Shaders ({len(shader_files)}) ---")
-                for info in sorted(shader_files, key=lambda x: x.filename):
-                    print(f"  {info.filename} ({info.file_size:,} bytes)")
-
-            # List BSP maps
-            bsp_files = [i for i in infos if i.filename.lower().endswith('.bsp')]
-            if bsp_files:
-                print(f"\n  --- BSP Maps ({len(bsp_files)}) ---")
-                for info in sorted(bsp_files, key=lambda x: x.filename):
-                    size_mb = info.file_size / 1024 / 1024
-                    print(f"  {info.filename} ({size_mb:.1f} MB)")
-
-    except zipfile.BadZipFile:
-        print(f"  ERROR: Not a valid ZIP/PK3 file")
+        with open(filepath, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            stats = _scan_pk3(mm)
+    except (ValueError, struct.error):
+        error = "Not a valid ZIP/PK3 file"
     except Exception as e:
-        print(f"  ERROR: {e}")
+        error = str(e)
+
+    if as_json:
+        return _pk3_json(filename, filesize, stats, error)
+
+    # Output is collected here and written in one go at the end
+    out = []
+    out.append(f"\n{'='*60}\n")
+    out.append(f"  PK3: {filename}\n")
+    out.append(f"  Size: {filesize:,} bytes ({filesize / 1024 / 1024:.1f} MB)\n")
+    out.append(f"{'='*60}\n")
+    if error is not None:
+        out.append(f"  ERROR: {error}\n")
+        return ''.join(out)
+
+    total_compressed = stats['compressed']
+    total_uncompressed = stats['uncompressed']
+    out.append(f"\n  Files: {stats['files']}\n")
+    out.append(f"  Compressed:   {total_compressed:>12,} bytes\n")
+    out.append(f"  Uncompressed: {total_uncompressed:>12,} bytes\n")
+
+    if total_compressed > 0:
+        ratio = (1 - total_compressed / max(total_uncompressed, 1)) * 100
+        out.append(f"  Compression:  {ratio:.1f}%\n")
+
+    # Print by extension
+    out.append(f"\n  --- By Extension ---\n")
+    out.append(f"  {'Extension':<12} {'Count':>8} {'Size':>14}\n")
+    for ext, count, size in stats['extensions']:
+        size_str = f"{size:,}"
+        ext = ext.decode('utf-8', errors='replace')
+        out.append(f"  {ext:<12} {count:>8} {size_str:>14}\n")
 
+    # Print by directory
+    out.append(f"\n  --- By Directory ---\n")
+    out.append(f"  {'Directory':<24} {'Count':>8} {'Size':>14}\n")
+    for dirname, count, size in stats['directories']:
+        size_str = f"{size:,}"
+        dirname = dirname.decode('utf-8', errors='replace')
+        out.append(f"  {dirname:<24} {count:>8} {size_str:>14}\n")
 
-def summary(directory):
+    # List TIKI files specifically (key for understanding models)
+    tiki_files = stats['tiki']
+    if tiki_files:
+        out.append(f"\n  --- TIKI Models ({len(tiki_files)}) ---\n")
+        for name, file_size in tiki_files:
+            name = name.decode('utf-8', errors='replace')
+            out.append(f"  {name} ({file_size:,} bytes)\n")
+
+    # List shader files
+    shader_files = stats['shaders']
+    if shader_files:
+        out.append(f"\n  --- Shaders ({len(shader_files)}) ---\n")
+        for name, file_size in shader_files:
+            name = name.decode('utf-8', errors='replace')
+            out.append(f"  {name} ({file_size:,} bytes)\n")
+
+    # List BSP maps
+    bsp_files = stats['bsp']
+    if bsp_files:
+        out.append(f"\n  --- BSP Maps ({len(bsp_files)}) ---\n")
+        for name, file_size in bsp_files:
+            name = name.decode('utf-8', errors='replace')
+            size_mb = file_size / 1024 / 1024
+            out.append(f"  {name} ({size_mb:.1f} MB)\n")
+
+    return ''.join(out)
+
+
+def summary(directory, as_json=False):
     """Summarize all PK3 files in a directory."""
-    pk3_files = sorted([
-        os.path.join(directory, f)
-        for f in os.listdir(directory)
-        if f.lower().endswith('.pk3')
-    ])
+    with os.scandir(directory) as it:
+        pk3_files = sorted(
+            (entry.path, entry.stat().st_size)
+            for entry in it
+            if entry.name.lower().endswith('.pk3') and entry.is_file()
+        )
 
     if not pk3_files:
-        print(f"No PK3 files found in {directory}")
+        if as_json:
+            _write_json([])
+        else:
+            print(f"No PK3 files found in {directory}")
         return
 
-    print(f"Found {len(pk3_files)} PK3 files in {directory}")
-    for filepath in pk3_files:
-        inspect_pk3(filepath)
+    if not as_json:
+        print(f"Found {len(pk3_files)} PK3 files in {directory}")
+    # Archives are inspected in parallel; map() yields reports in order
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import repeat
+    with ProcessPoolExecutor() as executor:
+        paths, sizes = zip(*pk3_files)
+        reports = executor.map(inspect_pk3, paths, sizes, repeat(as_json))
+        if as_json:
+            _write_json(list(reports))
+        else:
+            for report in reports:
+                sys.stdout.write(report)
 
 
 def main():
-    if len(sys.argv) < 2:
-        print(f"Usage: {sys.argv[0]} <pk3_path>")
-        print(f"       {sys.argv[0]} --summary <directory>")
-        sys.exit(1)
-
-    if sys.argv[1] == '--summary':
-        directory = sys.argv[2] if len(sys.argv) > 2 else '.'
-        summary(directory)
+    parser = argparse.ArgumentParser(description="PK3 (ZIP) archive inspector for FAKK2.")
+    parser.add_argument('pk3_path', nargs='?', help="PK3 archive to inspect")
+    parser.add_argument('--summary', metavar='DIRECTORY', nargs='?', const='.',
+                        help="inspect every .pk3 in DIRECTORY (default: .)")
+    parser.add_argument('--json', action='store_true',
+                        help="print the collected stats as JSON instead of the text report")
+    args = parser.parse_args()
+
+    if args.summary is not None and args.pk3_path is not None:
+        parser.error("a PK3 path cannot be combined with --summary")
+    if args.summary is not None:
+        summary(args.summary, args.json)
+    elif args.pk3_path is None:
+        parser.error("a PK3 path or --summary is required")
+    elif args.json:
+        _write_json(inspect_pk3(args.pk3_path, as_json=True))
     else:
-        inspect_pk3(sys.argv[1])
+        sys.stdout.write(inspect_pk3(args.pk3_path))
 
 
 if __name__ == '__main__':